@@ -1,5 +1,8 @@
 ﻿import numpy as np
 import pandas as pd
+from numba import njit
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
 from typing import Dict, Optional
 from ..cointegration import CointegrationTester
 from ..signals import ZScoreSignalGenerator
@@ -10,6 +13,39 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True)
+def _max_dd(r):
+    """Maximum drawdown of compounded returns in one streaming pass."""
+    equity = 1.0 + r[0]
+    peak = equity
+    dd = 0.0
+    for i in range(1, len(r)):
+        equity *= 1.0 + r[i]
+        peak = max(peak, equity)
+        dd = min(dd, equity / peak - 1.0)
+    return dd
+
+
+def _run_one_pair(pair, y_arr, x_arr, signal_gen):
+    """Signals and P&L for one pair; returns net returns as an ndarray."""
+    y, x = pd.Series(y_arr), pd.Series(x_arr)
+    signals = signal_gen.generate_signals(y, x, pair['hedge_ratio'], pair['intercept'])
+    pnl = signal_gen.compute_signal_pnl(signals, y, x, pair['hedge_ratio'])
+    return pnl['net_return'].to_numpy()
+
+
+def _run_shared_pair(shm_name, shape, dtype, col_y, col_x, pair, signal_gen):
+    """Attach to the shared price block, slice the pair's columns and run it."""
+    shm = SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        y_arr, x_arr = block[:, col_y].copy(), block[:, col_x].copy()
+        del block
+    finally:
+        shm.close()
+    return _run_one_pair(pair, y_arr, x_arr, signal_gen)
+
+
 class PairsBacktester:
     """Event-driven backtest: screen pairs, generate signals, compute P&L."""
 
@@ -18,7 +54,8 @@ class PairsBacktester:
         self.coint_tester = CointegrationTester(
             significance=config['cointegration']['significance'],
             min_half_life=config['cointegration']['min_half_life'],
-            max_half_life=config['cointegration']['max_half_life'])
+            max_half_life=config['cointegration']['max_half_life'],
+            adf_autolag=config['cointegration'].get('adf_autolag', 'AIC'))
         self.signal_gen = ZScoreSignalGenerator(
             entry_z=config['signals']['entry_z'],
             exit_z=config['signals']['exit_z'],
@@ -40,17 +77,41 @@ class PairsBacktester:
 
         pairs = pairs[:self.config['execution']['max_pairs']]
         trading = prices.iloc[window:]
-        pair_pnls = {}
+        col = {t: i for i, t in enumerate(trading.columns)}
+        values = trading.to_numpy(dtype=np.float64)
+        R = np.full((len(trading), len(pairs)), np.nan)
+
+        # Per-pair work is a few ms, so a pool only pays off when asked for.
+        workers = min(self.config['execution'].get('max_workers') or 1, len(pairs))
+        if workers > 1:
+            # Workers read prices from one shared block instead of each task
+            # pickling its own pair of columns.
+            shm = SharedMemory(create=True, size=values.nbytes)
+            try:
+                np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+                tasks = [(shm.name, values.shape, values.dtype, col[pair['ticker_y']],
+                          col[pair['ticker_x']], pair, self.signal_gen) for pair in pairs]
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    for j, pnl in enumerate(pool.map(_run_shared_pair, *zip(*tasks))):
+                        R[:, j] = pnl
+            finally:
+                shm.close()
+                shm.unlink()
+        else:
+            for j, pair in enumerate(pairs):
+                R[:, j] = _run_one_pair(pair, values[:, col[pair['ticker_y']]],
+                                        values[:, col[pair['ticker_x']]], self.signal_gen)
 
-        for pair in pairs:
-            y, x = trading[pair['ticker_y']], trading[pair['ticker_x']]
-            self.kalman.filter(y, x)
-            signals = self.signal_gen.generate_signals(y, x, pair['hedge_ratio'], pair['intercept'])
-            pnl = self.signal_gen.compute_signal_pnl(signals, y, x, pair['hedge_ratio'])
-            pair_pnls[f"{pair['ticker_y']}/{pair['ticker_x']}"] = pnl['net_return']
+        # Every pair is already aligned to trading.index, so the portfolio
+        # mean is a NaN-aware row mean over R rather than a pandas outer join.
+        valid = ~np.isnan(R)
+        counts = valid.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            port = np.where(counts > 0, np.where(valid, R, 0.0).sum(axis=1) / counts, np.nan)
 
-        all_ret = pd.DataFrame(pair_pnls)
-        port_ret = all_ret.mean(axis=1)
+        port_ret = pd.Series(port, index=trading.index)
+        all_ret = pd.DataFrame(R, index=trading.index,
+                               columns=[f"{p['ticker_y']}/{p['ticker_x']}" for p in pairs])
         return {'portfolio_returns': port_ret, 'pair_results': all_ret,
                 'metrics': self._compute_metrics(port_ret), 'pairs_selected': pairs}
 
@@ -61,8 +122,7 @@ class PairsBacktester:
         total = (1 + r).prod() - 1
         ann = (1 + total) ** (252/len(r)) - 1
         vol = r.std() * np.sqrt(252)
-        cum = (1 + r).cumprod()
-        dd = ((cum - cum.cummax()) / cum.cummax()).min()
+        dd = _max_dd(r.to_numpy(dtype=np.float64))
         wins = (r > 0).sum()
         trades = (r != 0).sum()
         gp = r[r > 0].sum()
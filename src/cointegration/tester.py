@@ -1,13 +1,87 @@
 ﻿import numpy as np
 import pandas as pd
-from statsmodels.tsa.stattools import adfuller, coint
-from itertools import combinations
+from numba import njit
+from statsmodels.tsa.stattools import adfuller
+from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
+from functools import lru_cache
 from typing import List, Dict
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _schwert_lag(n):
+    """Schwert (1989) rule-of-thumb ADF lag length for a sample of size n."""
+    return int(12 * (n / 100) ** 0.25)
+
+
+@njit(cache=True, error_model='numpy')
+def _rolling_ols(y, x, window, step):
+    """
+    Hedge ratio and intercept for each window ending at window, window+step, ...
+    Means and centred co-moments are updated Welford-style as points enter and
+    leave the window, and recomputed exactly once a full window has turned
+    over so rounding cannot build up. Windows containing a NaN, or with a
+    flat x, come back as NaN.
+    """
+    n_out = max(0, (len(y) - window + step - 1) // step)
+    beta, alpha = np.full(n_out, np.nan), np.full(n_out, np.nan)
+    cnt = 0
+    mx = my = cxx = cxy = 0.0
+    nan_count = 0
+    start = end = since_refresh = 0
+    for k in range(n_out):
+        target = window + k * step
+        while end < target:
+            xi, yi = x[end], y[end]
+            if np.isnan(xi) or np.isnan(yi):
+                nan_count += 1
+            else:
+                cnt += 1
+                dx = xi - mx
+                mx += dx / cnt
+                my += (yi - my) / cnt
+                cxx += dx * (xi - mx)
+                cxy += dx * (yi - my)
+            end += 1
+        while start < target - window:
+            xi, yi = x[start], y[start]
+            if np.isnan(xi) or np.isnan(yi):
+                nan_count -= 1
+            else:
+                cnt -= 1
+                if cnt == 0:
+                    mx = my = cxx = cxy = 0.0
+                else:
+                    mx_old, my_old = mx, my
+                    mx = mx_old - (xi - mx_old) / cnt
+                    my = my_old - (yi - my_old) / cnt
+                    cxx -= (xi - mx) * (xi - mx_old)
+                    cxy -= (xi - mx) * (yi - my_old)
+            start += 1
+            since_refresh += 1
+
+        if since_refresh >= window and cnt > 0:
+            mx = my = 0.0
+            for i in range(start, end):
+                if not (np.isnan(x[i]) or np.isnan(y[i])):
+                    mx += x[i]; my += y[i]
+            mx /= cnt; my /= cnt
+            cxx = cxy = 0.0
+            for i in range(start, end):
+                if not (np.isnan(x[i]) or np.isnan(y[i])):
+                    dx = x[i] - mx
+                    cxx += dx * dx
+                    cxy += dx * (y[i] - my)
+            since_refresh = 0
+
+        if nan_count == 0 and cxx > 1e-12 * cnt * max(mx * mx, 1.0):
+            beta[k] = cxy / cxx
+            alpha[k] = my - beta[k] * mx
+    return beta, alpha
+
+
 class CointegrationTester:
     """
     Screen pairs for cointegration using Engle-Granger two-step method.
@@ -20,12 +94,13 @@ class CointegrationTester:
     """
 
     def __init__(self, significance=0.05, min_half_life=5, max_half_life=120,
-                 min_correlation=0.5, rolling_window=252):
+                 min_correlation=0.5, rolling_window=252, adf_autolag='AIC'):
         self.significance = significance
         self.min_half_life = min_half_life
         self.max_half_life = max_half_life
         self.min_correlation = min_correlation
         self.rolling_window = rolling_window
+        self.adf_autolag = adf_autolag
 
     def engle_granger_test(self, y: pd.Series, x: pd.Series) -> Dict:
         """
@@ -33,64 +108,149 @@ class CointegrationTester:
         Step 1: OLS regression y on x for hedge ratio
         Step 2: ADF test on residuals for stationarity
         """
-        x_with_const = np.column_stack([np.ones(len(x)), x.values])
-        beta = np.linalg.lstsq(x_with_const, y.values, rcond=None)[0]
-        spread = y.values - beta[1] * x.values - beta[0]
+        y, x = np.asarray(y, dtype=np.float64), np.asarray(x, dtype=np.float64)
+        xbar, ybar = x.mean(), y.mean()
+        dx = x - xbar
+        sxx = dx @ dx
+        if sxx == 0:
+            # Flat x: no unique slope, take lstsq's minimum-norm solution.
+            beta0, beta1 = np.linalg.lstsq(
+                np.column_stack([np.ones(len(x)), x]), y, rcond=None)[0]
+        else:
+            beta1 = (dx @ (y - ybar)) / sxx
+            beta0 = ybar - beta1 * xbar
+
+        spread = np.multiply(x, beta1)
+        np.subtract(y, spread, out=spread)
+        spread -= beta0
+        return self._residual_test(spread, beta1, beta0)
 
-        adf_stat, p_value, _, _, critical_values, _ = adfuller(spread, autolag='AIC')
-        coint_stat, coint_pvalue, _ = coint(y, x)
+    def _residual_test(self, spread, hedge_ratio, intercept) -> Dict:
+        """
+        Single ADF on the OLS residuals. The Engle-Granger p-value comes from
+        MacKinnon's cointegration surface (N=2), which is what coint() does
+        after refitting the same regression. The lag is fixed by Schwert's
+        rule when adf_autolag is None, which replaces the per-lag AIC search
+        with a single regression.
+
+        adf_pvalue and critical_values refer to that same cointegration
+        distribution (adf_pvalue == coint_pvalue); the plain Dickey-Fuller
+        tables do not apply to estimated residuals.
+        """
+        if self.adf_autolag is None:
+            adf_stat = adfuller(spread, maxlag=_schwert_lag(len(spread)),
+                                regression='n', autolag=None)[0]
+        else:
+            adf_stat = adfuller(spread, regression='n', autolag=self.adf_autolag)[0]
+        coint_pvalue = mackinnonp(adf_stat, regression='c', N=2)
+        crit = mackinnoncrit(N=2, regression='c', nobs=len(spread) - 1)
+        critical_values = dict(zip(['1%', '5%', '10%'], crit))
 
         return {
-            'adf_statistic': adf_stat, 'adf_pvalue': p_value,
-            'coint_statistic': coint_stat, 'coint_pvalue': coint_pvalue,
-            'hedge_ratio': beta[1], 'intercept': beta[0],
+            'adf_statistic': adf_stat, 'adf_pvalue': coint_pvalue,
+            'coint_statistic': adf_stat, 'coint_pvalue': coint_pvalue,
+            'hedge_ratio': hedge_ratio, 'intercept': intercept,
             'spread': spread, 'critical_values': critical_values
         }
 
+    @staticmethod
+    def _batch_hedge_ratios(values, idx_y, idx_x):
+        """
+        Closed-form OLS of y on [1, x] for many column pairs at once.
+        Sums run on mean-centred columns so float32 input keeps its precision;
+        coefficients come back as float64.
+        """
+        means = values.mean(axis=0)
+        dev = values - means
+        sxx = np.einsum('ij,ij->j', dev[:, idx_x], dev[:, idx_x])
+        sxy = np.einsum('ij,ij->j', dev[:, idx_y], dev[:, idx_x])
+        beta = (sxy / sxx).astype(np.float64)
+        ybar, xbar = means[idx_y].astype(np.float64), means[idx_x].astype(np.float64)
+        return beta, ybar - beta * xbar
+
     def estimate_half_life(self, spread: np.ndarray) -> float:
         """
         Half-life of mean reversion via OLS.
         Model: delta_spread(t) = theta * spread(t-1) + eps
         Half-life = -ln(2) / theta
         """
-        spread_lag = spread[:-1]
-        spread_diff = np.diff(spread)
-        x = np.column_stack([np.ones(len(spread_lag)), spread_lag])
-        theta = np.linalg.lstsq(x, spread_diff, rcond=None)[0][1]
+        spread = np.asarray(spread, dtype=np.float64)
+        return self._half_lives(spread[:, None])[0]
+
+    @staticmethod
+    def _half_lives(spreads):
+        """Column-wise AR(1) half-lives of a (T, pairs) residual block."""
+        dx = spreads[:-1] - spreads[:-1].mean(axis=0)
+        dy = np.diff(spreads, axis=0)
+        dy = dy - dy.mean(axis=0)
+        sxx = np.einsum('ij,ij->j', dx, dx)
+        sxy = np.einsum('ij,ij->j', dx, dy)
+        ok = sxx >= 1e-12
+        theta = np.zeros(len(sxx))
+        theta[ok] = sxy[ok] / sxx[ok]
 
-        if theta >= 0:
-            return np.inf
-        return -np.log(2) / theta
+        half_lives = np.full(len(sxx), np.inf)
+        mean_reverting = theta < 0
+        half_lives[mean_reverting] = -np.log(2) / theta[mean_reverting]
+        return half_lives
 
     def screen_universe(self, prices: pd.DataFrame) -> List[Dict]:
         """Screen all pairs for cointegration, sorted by half-life."""
         tickers = prices.columns.tolist()
-        corr_matrix = prices.pct_change().dropna().corr()
-        valid_pairs = []
+        values = prices.to_numpy(dtype=np.float32)
+        complete = ~np.isnan(values).any(axis=0)
+        tested = []
 
-        for ticker_y, ticker_x in combinations(tickers, 2):
-            correlation = corr_matrix.loc[ticker_y, ticker_x]
-            if abs(correlation) < self.min_correlation:
-                continue
+        returns = values[1:] / values[:-1] - 1
+        returns = returns[~np.isnan(returns).any(axis=1)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            C = np.atleast_2d(np.corrcoef(returns, rowvar=False, dtype=np.float32))
+        iu = np.triu_indices_from(C, 1)
+        corrs = C[iu].astype(np.float64)
+        keep = np.abs(corrs) >= self.min_correlation
+        idx_y, idx_x, corrs = iu[0][keep], iu[1][keep], corrs[keep]
+        dense = complete[idx_y] & complete[idx_x]
 
-            y = prices[ticker_y].dropna()
-            x = prices[ticker_x].dropna()
-            common_idx = y.index.intersection(x.index)
-            if len(common_idx) < self.rolling_window:
-                continue
+        # Gap-free pairs share one vectorised OLS; residuals come out as a
+        # (T, pairs) block and only the ADF runs per column.
+        if dense.any() and len(values) >= self.rolling_window:
+            by, bx, dense_corrs = idx_y[dense], idx_x[dense], corrs[dense]
+            beta, intercept = self._batch_hedge_ratios(values, by, bx)
+            # float32 prices promote against the float64 coefficients, so the
+            # residuals handed to statsmodels are float64.
+            spreads = values[:, by] - beta * values[:, bx] - intercept
+            # Half-life bounds are cheap to check for the whole block, so
+            # pairs that would fail them never reach statsmodels.
+            half_lives = self._half_lives(spreads)
+            in_bounds = (half_lives >= self.min_half_life) & (half_lives <= self.max_half_life)
+            for k in np.flatnonzero(in_bounds):
+                ticker_y, ticker_x = tickers[by[k]], tickers[bx[k]]
+                try:
+                    results = self._residual_test(spreads[:, k], beta[k], intercept[k])
+                except Exception as e:
+                    logger.warning(f"EG test failed for {ticker_y}-{ticker_x}: {e}")
+                    continue
+                tested.append((ticker_y, ticker_x, dense_corrs[k], results, half_lives[k]))
 
-            y, x = y.loc[common_idx], x.loc[common_idx]
+        for i, j, correlation in zip(idx_y[~dense], idx_x[~dense], corrs[~dense]):
+            ticker_y, ticker_x = tickers[i], tickers[j]
+            y, x = values[:, i], values[:, j]
+            common = ~np.isnan(y) & ~np.isnan(x)
+            if common.sum() < self.rolling_window:
+                continue
 
             try:
-                results = self.engle_granger_test(y, x)
+                results = self.engle_granger_test(y[common], x[common])
             except Exception as e:
                 logger.warning(f"EG test failed for {ticker_y}-{ticker_x}: {e}")
                 continue
+            half_life = self.estimate_half_life(results['spread'])
+            tested.append((ticker_y, ticker_x, correlation, results, half_life))
 
+        valid_pairs = []
+        for ticker_y, ticker_x, correlation, results, half_life in tested:
             if results['coint_pvalue'] > self.significance:
                 continue
-
-            half_life = self.estimate_half_life(results['spread'])
             if not (self.min_half_life <= half_life <= self.max_half_life):
                 continue
 
@@ -107,17 +267,30 @@ class CointegrationTester:
         logger.info(f"Found {len(valid_pairs)} cointegrated pairs")
         return valid_pairs
 
-    def rolling_cointegration_check(self, y, x, window=252, step=21):
-        """Rolling cointegration test to monitor pair stability."""
-        results = []
-        for end in range(window, len(y), step):
+    def rolling_cointegration_check(self, y, x, window=252, step=21, beta_tol=None):
+        """
+        Rolling cointegration test to monitor pair stability.
+        Hedge ratios for all windows come from one running-moment pass; with
+        beta_tol set, the ADF is only rerun once the hedge ratio has moved by
+        more than beta_tol since the last tested window.
+        """
+        y_arr = y.to_numpy(dtype=np.float64)
+        x_arr = x.to_numpy(dtype=np.float64)
+        betas, alphas = _rolling_ols(y_arr, x_arr, window, step)
+        results, last = [], None
+        for k, end in enumerate(range(window, len(y), step)):
+            beta, alpha = betas[k], alphas[k]
+            if np.isnan(beta):
+                continue
+            spread = y_arr[end-window:end] - beta * x_arr[end-window:end] - alpha
             try:
-                test = self.engle_granger_test(y.iloc[end-window:end], x.iloc[end-window:end])
-                hl = self.estimate_half_life(test['spread'])
+                if beta_tol is None or last is None or abs(beta - last[0]) > beta_tol:
+                    last = (beta, self._residual_test(spread, beta, alpha)['coint_pvalue'])
+                hl = self.estimate_half_life(spread)
                 results.append({
-                    'date': y.index[end-1], 'coint_pvalue': test['coint_pvalue'],
-                    'hedge_ratio': test['hedge_ratio'], 'half_life': hl,
-                    'is_cointegrated': test['coint_pvalue'] < self.significance
+                    'date': y.index[end-1], 'coint_pvalue': last[1],
+                    'hedge_ratio': beta, 'half_life': hl,
+                    'is_cointegrated': last[1] < self.significance
                 })
             except Exception:
                 continue
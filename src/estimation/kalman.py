@@ -1,8 +1,35 @@
 ﻿import numpy as np
 import pandas as pd
+from numba import njit
 from typing import Tuple
 
 
+@njit(cache=True, error_model='numpy')
+def _kalman_core(y_arr, x_arr, delta, Ve, b0, P0):
+    """Scalar Kalman recursion; returns (beta, P, forecast error) arrays."""
+    n = len(y_arr)
+    beta, P = np.zeros(n), np.zeros(n)
+    spread = np.zeros(n)
+
+    beta[0], P[0] = b0, P0
+    beta_prev, P_prev = b0, P0
+    Vw = delta / (1 - delta)
+
+    for t in range(1, n):
+        P_pred = P_prev + Vw
+        x_t, y_t = x_arr[t], y_arr[t]
+
+        e = y_t - beta_prev * x_t
+        S = x_t * P_pred * x_t + Ve
+        K = P_pred * x_t / S
+
+        beta_prev = beta_prev + K * e
+        P_prev = (1 - K * x_t) * P_pred
+        beta[t], P[t] = beta_prev, P_prev
+        spread[t] = e
+    return beta, P, spread
+
+
 class KalmanHedgeRatio:
     """
     Online Kalman Filter for dynamic hedge ratio estimation.
@@ -19,31 +46,16 @@ class KalmanHedgeRatio:
 
     def filter(self, y: pd.Series, x: pd.Series) -> pd.DataFrame:
         """Run Kalman Filter to estimate dynamic hedge ratio."""
-        n = len(y)
-        beta, P = np.zeros(n), np.zeros(n)
-        spread, forecast_error = np.zeros(n), np.zeros(n)
-
-        beta[0], P[0] = self.initial_mean, self.initial_cov
-        Vw = self.delta / (1 - self.delta)
-
-        for t in range(1, n):
-            beta_pred = beta[t-1]
-            P_pred = P[t-1] + Vw
-            x_t, y_t = x.iloc[t], y.iloc[t]
-
-            e = y_t - beta_pred * x_t
-            S = x_t * P_pred * x_t + self.Ve
-            K = P_pred * x_t / S
-
-            beta[t] = beta_pred + K * e
-            P[t] = (1 - K * x_t) * P_pred
-            spread[t] = e
-            forecast_error[t] = e
+        y_arr = y.to_numpy(dtype=np.float64)
+        x_arr = x.to_numpy(dtype=np.float64)
+        beta, P, forecast_error = _kalman_core(
+            y_arr, x_arr, self.delta, self.Ve,
+            float(self.initial_mean), float(self.initial_cov))
 
         results = pd.DataFrame(index=y.index)
         results['hedge_ratio'] = beta
         results['hedge_ratio_std'] = np.sqrt(P)
-        results['spread'] = y.values - beta * x.values
+        results['spread'] = y_arr - beta * x_arr
         results['forecast_error'] = forecast_error
         return results
 
@@ -62,13 +62,14 @@ class VaRCalculator:
 
     @staticmethod
     def historical_var(returns, confidence=0.95, horizon=1):
-        sorted_r = returns.dropna().sort_values()
-        idx = int(len(sorted_r) * (1 - confidence))
-        return abs(sorted_r.iloc[idx]) * np.sqrt(horizon)
+        a = returns.dropna().to_numpy()
+        k = int(len(a) * (1 - confidence))
+        return abs(np.partition(a, k)[k]) * np.sqrt(horizon)
 
     @staticmethod
     def expected_shortfall(returns, confidence=0.95):
-        sorted_r = returns.dropna().sort_values()
-        idx = int(len(sorted_r) * (1 - confidence))
-        tail = sorted_r.iloc[:idx]
-        return abs(tail.mean()) if len(tail) > 0 else 0.0
+        a = returns.dropna().to_numpy()
+        k = int(len(a) * (1 - confidence))
+        if k == 0:
+            return 0.0
+        return abs(np.partition(a, k - 1)[:k].mean())
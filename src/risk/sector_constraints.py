@@ -20,23 +20,37 @@ class SectorConstraintManager:
         self.max_sector_net = max_sector_net
         self.max_sector_gross = max_sector_gross
         self.sector_map = sector_map or {}
+        self._sectors = sorted(set(self.sector_map.values()) | {'Unknown'})
+        self._sector_idx = {s: i for i, s in enumerate(self._sectors)}
+
+    def _sector_code(self, ticker):
+        # sector_map is public and may gain sectors after construction.
+        sector = self.sector_map.get(ticker, 'Unknown')
+        if sector not in self._sector_idx:
+            self._sector_idx[sector] = len(self._sectors)
+            self._sectors.append(sector)
+        return self._sector_idx[sector]
 
     def compute_sector_exposures(self, active_pairs, position_sizes):
-        sector_long, sector_short = {}, {}
+        y_idx, x_idx, sizes = [], [], []
         for pair in active_pairs:
-            pk = f"{pair['ticker_y']}/{pair['ticker_x']}"
-            size = position_sizes.get(pk, 0)
+            size = position_sizes.get(f"{pair['ticker_y']}/{pair['ticker_x']}", 0)
             if size == 0: continue
-            ys = self.sector_map.get(pair['ticker_y'], 'Unknown')
-            xs = self.sector_map.get(pair['ticker_x'], 'Unknown')
-            sector_long[ys] = sector_long.get(ys, 0) + abs(size)
-            sector_short[xs] = sector_short.get(xs, 0) + abs(size)
-
-        exposures = {}
-        for s in set(list(sector_long) + list(sector_short)):
-            l, sh = sector_long.get(s, 0), sector_short.get(s, 0)
-            exposures[s] = SectorExposure(s, l, sh, l-sh, l+sh)
-        return exposures
+            y_idx.append(self._sector_code(pair['ticker_y']))
+            x_idx.append(self._sector_code(pair['ticker_x']))
+            sizes.append(size)
+
+        k = len(self._sectors)
+        sizes = np.abs(np.asarray(sizes, dtype=np.float64))
+        long, short = np.zeros(k), np.zeros(k)
+        np.add.at(long, np.asarray(y_idx, dtype=np.intp), sizes)
+        np.add.at(short, np.asarray(x_idx, dtype=np.intp), sizes)
+
+        touched = np.zeros(k, dtype=bool)
+        touched[y_idx] = touched[x_idx] = True
+        return {self._sectors[i]: SectorExposure(self._sectors[i], long[i], short[i],
+                                                 long[i] - short[i], long[i] + short[i])
+                for i in np.flatnonzero(touched)}
 
     def check_constraints(self, exposures):
         return {s: abs(e.net_exposure) <= self.max_sector_net and
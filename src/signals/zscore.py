@@ -1,5 +1,6 @@
 ﻿import numpy as np
 import pandas as pd
+from numba import njit
 from dataclasses import dataclass
 from enum import Enum
 
@@ -10,6 +11,70 @@ class SignalType(Enum):
     FLAT = 0
 
 
+@njit(cache=True)
+def _run_fsm(z, entry, exit_, stop):
+    """Path-dependent position state machine over a z-score array."""
+    n = len(z)
+    positions = np.zeros(n, dtype=np.int8)
+    position = 0
+    for i in range(1, n):
+        z_i = z[i]
+        if np.isnan(z_i):
+            continue
+
+        if position == 0:
+            if z_i < -entry:
+                position = 1
+            elif z_i > entry:
+                position = -1
+        elif position == 1:
+            if z_i > -exit_ or z_i > stop:
+                position = 0
+        elif position == -1:
+            if z_i < exit_ or z_i < -stop:
+                position = 0
+
+        positions[i] = position
+    return positions
+
+
+@njit(cache=True, error_model='numpy')
+def _ewm_z(x, alpha):
+    """
+    (x - ewm mean) / ewm std in one pass. Follows pandas' adjust=True,
+    bias-corrected recursion, so output matches spread.ewm(...).mean()/.std().
+    """
+    n = len(x)
+    z = np.full(n, np.nan)
+    decay = 1.0 - alpha
+    mean, var = np.nan, 0.0
+    sum_wt, sum_wt2, old_wt = 1.0, 1.0, 1.0
+    for i in range(n):
+        x_i = x[i]
+        is_obs = not np.isnan(x_i)
+        if np.isnan(mean):
+            if is_obs:
+                mean = x_i
+        else:
+            sum_wt *= decay
+            sum_wt2 *= decay * decay
+            old_wt *= decay
+            if is_obs:
+                old_mean = mean
+                if mean != x_i:
+                    mean = (old_wt * old_mean + x_i) / (old_wt + 1.0)
+                var = (old_wt * (var + (old_mean - mean) ** 2) +
+                       (x_i - mean) ** 2) / (old_wt + 1.0)
+                sum_wt += 1.0
+                sum_wt2 += 1.0
+                old_wt += 1.0
+        if is_obs:
+            denom = sum_wt * sum_wt - sum_wt2
+            if denom > 0:
+                z[i] = (x_i - mean) / np.sqrt(sum_wt * sum_wt / denom * var)
+    return z
+
+
 @dataclass
 class Signal:
     timestamp: pd.Timestamp
@@ -40,11 +105,11 @@ class ZScoreSignalGenerator:
 
     def compute_zscore(self, spread):
         if self.use_ewm:
-            mean = spread.ewm(halflife=self.ewm_halflife).mean()
-            std = spread.ewm(halflife=self.ewm_halflife).std()
-        else:
-            mean = spread.rolling(self.lookback).mean()
-            std = spread.rolling(self.lookback).std()
+            alpha = 1 - np.exp(-np.log(2) / self.ewm_halflife)
+            z = _ewm_z(spread.to_numpy(dtype=np.float64), alpha)
+            return pd.Series(z, index=spread.index)
+        mean = spread.rolling(self.lookback).mean()
+        std = spread.rolling(self.lookback).std()
         return (spread - mean) / std
 
     def generate_signals(self, y, x, hedge_ratio, intercept=0.0):
@@ -52,33 +117,15 @@ class ZScoreSignalGenerator:
         spread = self.compute_spread(y, x, hedge_ratio, intercept)
         zscore = self.compute_zscore(spread)
 
+        z_vals = zscore.to_numpy(dtype=np.float64)
+        positions = _run_fsm(z_vals, self.entry_z, self.exit_z, self.stop_z)
+
         signals = pd.DataFrame(index=spread.index)
         signals['spread'] = spread
-        signals['zscore'] = zscore
-        signals['position'] = 0
-
-        position = 0
-        for i in range(1, len(signals)):
-            z = zscore.iloc[i]
-            if np.isnan(z):
-                continue
-
-            if position == 0:
-                if z < -self.entry_z:
-                    position = 1
-                elif z > self.entry_z:
-                    position = -1
-            elif position == 1:
-                if z > -self.exit_z or z > self.stop_z:
-                    position = 0
-            elif position == -1:
-                if z < self.exit_z or z < -self.stop_z:
-                    position = 0
-
-            signals.iloc[i, signals.columns.get_loc('position')] = position
-
+        signals['zscore'] = z_vals
+        signals['position'] = positions
         signals['confidence'] = np.clip(
-            (np.abs(signals['zscore']) - self.exit_z) /
+            (np.abs(z_vals) - self.exit_z) /
             (self.entry_z - self.exit_z), 0, 1)
         return signals
 
@@ -86,8 +133,9 @@ class ZScoreSignalGenerator:
         """Compute strategy P&L with transaction costs."""
         pnl = pd.DataFrame(index=signals.index)
         spread_ret = y.pct_change() - hedge_ratio * x.pct_change()
-        pnl['strategy_return'] = signals['position'].shift(1) * spread_ret
-        pnl['transaction_costs'] = signals['position'].diff().abs() * tc_bps / 10000
+        position = signals['position'].astype(np.float64)
+        pnl['strategy_return'] = position.shift(1) * spread_ret
+        pnl['transaction_costs'] = position.diff().abs() * tc_bps / 10000
         pnl['net_return'] = pnl['strategy_return'] - pnl['transaction_costs']
         pnl['cumulative_return'] = (1 + pnl['net_return']).cumprod()
         return pnl
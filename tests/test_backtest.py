@@ -0,0 +1,10 @@
+﻿import numpy as np
+import pandas as pd
+from src.backtest.engine import _max_dd
+
+def test_max_drawdown_matches_cummax():
+    np.random.seed(42)
+    r = pd.Series(np.random.normal(0, 0.01, 500))
+    cum = (1 + r).cumprod()
+    expected = ((cum - cum.cummax()) / cum.cummax()).min()
+    assert np.isclose(_max_dd(r.to_numpy()), expected)
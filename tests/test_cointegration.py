@@ -1,5 +1,7 @@
 ﻿import numpy as np
 import pandas as pd
+from statsmodels.tsa.stattools import coint
+from src.cointegration import CointegrationTester
 
 def generate_cointegrated_pair(n=500, beta=1.5, mr=0.1):
     np.random.seed(42)
@@ -23,3 +25,97 @@ def test_half_life_positive():
     theta = np.linalg.lstsq(x, np.diff(spread), rcond=None)[0][1]
     assert theta < 0
     assert -np.log(2)/theta > 0
+
+def test_eg_pvalue_matches_coint():
+    data = generate_cointegrated_pair()
+    res = CointegrationTester(adf_autolag=None).engle_granger_test(data['Y'], data['X'])
+    stat, pvalue, _ = coint(data['Y'], data['X'], maxlag=int(12 * 5 ** 0.25), autolag=None)
+    assert np.isclose(res['coint_statistic'], stat)
+    assert np.isclose(res['coint_pvalue'], pvalue)
+    res = CointegrationTester().engle_granger_test(data['Y'], data['X'])
+    stat, pvalue, crit = coint(data['Y'], data['X'])
+    assert np.isclose(res['coint_statistic'], stat)
+    assert np.isclose(res['coint_pvalue'], pvalue)
+    assert res['adf_pvalue'] == res['coint_pvalue']
+    assert np.allclose(list(res['critical_values'].values()), crit)
+    assert abs(res['hedge_ratio'] - 1.5) < 0.1
+
+def test_screen_universe_handles_gaps():
+    data = generate_cointegrated_pair()
+    data['Z'] = data['X'] * 1.01
+    data.iloc[:10, 2] = np.nan
+    pairs = CointegrationTester(min_half_life=1).screen_universe(data)
+    assert any(p['ticker_y'] == 'Y' and p['ticker_x'] == 'X' for p in pairs)
+    assert all(p['coint_pvalue'] <= 0.05 for p in pairs)
+
+def test_half_life_closed_form_matches_ols():
+    data = generate_cointegrated_pair()
+    spread = data['Y'].values - 1.5 * data['X'].values
+    x = np.column_stack([np.ones(len(spread)-1), spread[:-1]])
+    theta = np.linalg.lstsq(x, np.diff(spread), rcond=None)[0][1]
+    tester = CointegrationTester()
+    assert np.isclose(tester.estimate_half_life(spread), -np.log(2)/theta)
+    assert tester.estimate_half_life(np.ones(100)) == np.inf
+
+def test_rolling_check_matches_windowed_eg():
+    data = generate_cointegrated_pair()
+    tester = CointegrationTester()
+    rolling = tester.rolling_cointegration_check(data['Y'], data['X'], window=252, step=63)
+    assert len(rolling) == len(range(252, 500, 63))
+    test = tester.engle_granger_test(data['Y'].iloc[63:315], data['X'].iloc[63:315])
+    assert np.isclose(rolling['hedge_ratio'].iloc[1], test['hedge_ratio'])
+    assert np.isclose(rolling['coint_pvalue'].iloc[1], test['coint_pvalue'])
+
+def test_eg_hedge_ratio_matches_lstsq_at_high_prices():
+    np.random.seed(7)
+    x = 1e5 + np.cumsum(np.random.normal(0, 1, 60))
+    y = 0.7 * x + 3e4 + np.random.normal(0, 1, 60)
+    beta = np.linalg.lstsq(np.column_stack([np.ones(60), x]), y, rcond=None)[0]
+    res = CointegrationTester().engle_granger_test(y, x)
+    assert np.isclose(res['hedge_ratio'], beta[1], rtol=1e-10)
+    assert np.isclose(res['intercept'], beta[0], rtol=1e-10)
+
+def test_eg_flat_x_is_finite():
+    np.random.seed(7)
+    y = 50 + np.random.normal(0, 1, 300)
+    res = CointegrationTester().engle_granger_test(y, np.full(300, 100.0))
+    assert np.isfinite(res['hedge_ratio']) and np.isfinite(res['intercept'])
+
+def test_rolling_ols_long_series_high_prices():
+    from src.cointegration.tester import _rolling_ols
+    np.random.seed(3)
+    n, window = 5000, 60
+    x = 1e5 + np.cumsum(np.random.normal(0, 1, n))
+    y = 0.7 * x + 3e4 + np.random.normal(0, 1, n)
+    beta, alpha = _rolling_ols(y, x, window, 1)
+    for end in (window, 2500, n - 1):
+        b = np.polyfit(x[end-window:end], y[end-window:end], 1)
+        assert np.isclose(beta[end-window], b[0], rtol=1e-9, atol=0)
+        assert np.isclose(alpha[end-window], b[1], rtol=1e-9, atol=0)
+
+def test_rolling_check_skips_flat_windows():
+    data = generate_cointegrated_pair()
+    x = data['X'].copy()
+    x.iloc[:300] = 100.0
+    rolling = CointegrationTester().rolling_cointegration_check(data['Y'], x, window=252, step=21)
+    assert len(rolling) > 0
+    assert rolling.index[0] > data.index[300]
+
+def test_half_life_gate_keeps_pair_set():
+    np.random.seed(11)
+    n = 500
+    idx = pd.date_range('2020-01-01', periods=n, freq='B')
+    cols = {}
+    for g, mr in enumerate([0.6, 0.3, 0.1, 0.05, 0.01]):
+        x = 100 * np.exp(np.cumsum(np.random.normal(0.0005, 0.01, n)))
+        s = np.zeros(n)
+        for i in range(1, n):
+            s[i] = (1 - mr) * s[i-1] + np.random.normal(0, 0.5)
+        cols[f'X{g}'], cols[f'Y{g}'] = x, 1.2 * x + s + 20
+    data = pd.DataFrame(cols, index=idx)
+
+    wide = CointegrationTester(min_half_life=0, max_half_life=np.inf).screen_universe(data)
+    gated = CointegrationTester(min_half_life=2, max_half_life=30).screen_universe(data)
+    expected = [(p['ticker_y'], p['ticker_x']) for p in wide if 2 <= p['half_life'] <= 30]
+    assert 0 < len(expected) < len(wide)
+    assert [(p['ticker_y'], p['ticker_x']) for p in gated] == expected
@@ -0,0 +1,32 @@
+﻿import numpy as np
+import pandas as pd
+from src.estimation import KalmanHedgeRatio
+
+def test_kalman_tracks_static_beta():
+    np.random.seed(42)
+    x = pd.Series(100 + np.cumsum(np.random.normal(0, 1, 500)))
+    y = 1.5 * x + np.random.normal(0, 0.5, 500)
+    res = KalmanHedgeRatio().filter(y, x)
+    assert abs(res['hedge_ratio'].iloc[-1] - 1.5) < 0.05
+    assert (res['hedge_ratio_std'] >= 0).all()
+
+def test_kalman_matches_online_update():
+    np.random.seed(0)
+    x = pd.Series(50 + np.cumsum(np.random.normal(0, 1, 50)))
+    y = 0.8 * x + np.random.normal(0, 1, 50)
+    kf = KalmanHedgeRatio()
+    res = kf.filter(y, x)
+    beta, P = kf.initial_mean, kf.initial_cov
+    for t in range(1, len(y)):
+        beta, P, e = kf.online_update(y.iloc[t], x.iloc[t], beta, P)
+    assert np.isclose(res['hedge_ratio'].iloc[-1], beta)
+    assert np.isclose(res['forecast_error'].iloc[-1], e)
+
+def test_kalman_nan_in_x_propagates():
+    np.random.seed(1)
+    x = pd.Series(50 + np.cumsum(np.random.normal(0, 1, 50)))
+    y = 0.8 * x + np.random.normal(0, 1, 50)
+    x.iloc[20] = np.nan
+    res = KalmanHedgeRatio().filter(y, x)
+    assert np.isfinite(res['hedge_ratio'].iloc[:20]).all()
+    assert res['hedge_ratio'].iloc[20:].isna().all()
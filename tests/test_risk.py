@@ -0,0 +1,42 @@
+﻿import numpy as np
+import pandas as pd
+from src.risk import VaRCalculator
+
+def test_var_and_es_match_sorted_tail():
+    np.random.seed(42)
+    r = pd.Series(np.random.standard_t(4, 1000) * 0.01)
+    r.iloc[[3, 500]] = np.nan
+    for conf in (0.95, 0.99):
+        s = r.dropna().sort_values()
+        k = int(len(s) * (1 - conf))
+        assert VaRCalculator.historical_var(r, conf, horizon=4) == abs(s.iloc[k]) * 2
+        assert np.isclose(VaRCalculator.expected_shortfall(r, conf), abs(s.iloc[:k].mean()))
+
+def test_var_and_es_with_empty_tail():
+    r = pd.Series([0.01, -0.02, 0.005, -0.01, 0.0])
+    s = r.sort_values()
+    assert VaRCalculator.historical_var(r, 0.95) == abs(s.iloc[0])
+    assert VaRCalculator.expected_shortfall(r, 0.95) == 0.0
+
+def test_sector_exposures_aggregate_legs():
+    from src.risk.sector_constraints import SectorConstraintManager
+    m = SectorConstraintManager(sector_map={'A': 'Tech', 'B': 'Tech', 'C': 'Fin'})
+    pairs = [{'ticker_y': 'A', 'ticker_x': 'C'}, {'ticker_y': 'B', 'ticker_x': 'Z'},
+             {'ticker_y': 'C', 'ticker_x': 'A'}, {'ticker_y': 'B', 'ticker_x': 'C'}]
+    sizes = {'A/C': 0.1, 'B/Z': -0.05, 'C/A': 0.2, 'B/C': 0}
+    exp = m.compute_sector_exposures(pairs, sizes)
+    assert set(exp) == {'Tech', 'Fin', 'Unknown'}
+    assert np.isclose(exp['Tech'].long_exposure, 0.15)
+    assert np.isclose(exp['Tech'].short_exposure, 0.2)
+    assert np.isclose(exp['Fin'].net_exposure, 0.1)
+    assert exp['Unknown'].long_exposure == 0 and np.isclose(exp['Unknown'].short_exposure, 0.05)
+    assert m.compute_sector_exposures([], {}) == {}
+    assert m.compute_sector_exposures(pairs, {}) == {}
+
+def test_sector_map_updates_after_init():
+    from src.risk.sector_constraints import SectorConstraintManager
+    m = SectorConstraintManager(sector_map={'A': 'Tech'})
+    m.sector_map['D'] = 'Energy'
+    exp = m.compute_sector_exposures([{'ticker_y': 'D', 'ticker_x': 'A'}], {'D/A': 0.1})
+    assert set(exp) == {'Energy', 'Tech'}
+    assert np.isclose(exp['Energy'].long_exposure, 0.1)
@@ -1,5 +1,6 @@
 ﻿import numpy as np
 import pandas as pd
+from src.signals.zscore import _run_fsm
 
 def test_zscore_symmetry():
     np.random.seed(42)
@@ -10,3 +11,18 @@ def test_zscore_symmetry():
 def test_position_entry():
     z = np.linspace(-3, 3, 100)
     assert np.argmax(z > 2.0) > 0
+
+def test_fsm_entry_exit_stop():
+    z = np.array([0.0, -2.5, -1.0, -0.2, 2.5, 1.0, np.nan, 0.3, 0.0])
+    pos = _run_fsm(z, 2.0, 0.5, 3.5)
+    assert pos.dtype == np.int8
+    assert pos.tolist() == [0, 1, 1, 0, -1, -1, 0, 0, 0]
+
+def test_ewm_zscore_matches_pandas():
+    from src.signals import ZScoreSignalGenerator
+    np.random.seed(42)
+    spread = pd.Series(np.cumsum(np.random.normal(0, 0.1, 500)) + np.random.normal(0, 1, 500))
+    spread.iloc[[0, 200, 201]] = np.nan
+    ref = (spread - spread.ewm(halflife=30).mean()) / spread.ewm(halflife=30).std()
+    z = ZScoreSignalGenerator(ewm_halflife=30).compute_zscore(spread)
+    assert np.allclose(z, ref, equal_nan=True)